@@ -322,7 +322,8 @@ async def on_pick_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
     q = update.callback_query
     await q.answer()
     _, iso_date = q.data.split("|", 1)
-    slots = await api_get("/slots/", {"date": iso_date})
+    # Список слотов постраничный - берем первую страницу (на одну дату слотов немного)
+    slots = (await api_get("/slots/", {"date": iso_date}))["results"]
     if not slots:
         await q.edit_message_text(
             "На выбранную дату времени нет. Попробуйте другую дату.",
@@ -1,17 +1,34 @@
-from rest_framework import viewsets, routers, mixins
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework import viewsets, routers, mixins, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from datetime import date, timedelta
-from .models import Automobile, Driver, Slot, Appointment, SlotStatus, AppointmentStatus
-import re
+from .models import (
+    Automobile,
+    Driver,
+    Slot,
+    Appointment,
+    SlotStatus,
+    AppointmentStatus,
+    normalize_phone,
+)
 from .serializers import (
     AutomobileSerializer,
     DriverSerializer,
+    DriverReadSerializer,
+    DriverDetailSerializer,
     SlotSerializer,
     AppointmentSerializer,
+    AppointmentReadSerializer,
 )
 
 
+# Условие поиска водителя: телефон как есть или его нормализованные цифры
+def _phone_q(phone: str) -> Q:
+    return Q(phone=phone) | Q(phone_normalized=normalize_phone(phone))
+
+
 # CRUD над машинами
 class AutomobileViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
     queryset = Automobile.objects.all()
@@ -23,21 +40,24 @@ class DriverViewSet(viewsets.ModelViewSet):
     queryset = Driver.objects.select_related("car")
     serializer_class = DriverSerializer
 
+    def get_serializer_class(self):
+
+        # Для чтения - сериализатор без валидаторов записи
+        if self.action in ("list", "retrieve"):
+            return DriverReadSerializer
+        return super().get_serializer_class()
+
     @action(detail=False, methods=["get"])
     def by_phone(self, request):
         phone = (request.query_params.get("phone") or "").strip()
         if not phone:
             return Response({"detail": "phone required"}, status=400)
 
-        # Нормализуем: оставляем только цифры
-        norm = re.sub(r"\D+", "", phone)
-
-        # Обходим водителей и сравниваем нормализованные номера
-        for d in Driver.objects.select_related("car").all():
-            db_norm = re.sub(r"\D+", "", d.phone or "")
-            if db_norm == norm:
-                return Response(DriverSerializer(d).data)
-        return Response({"detail": "not found"}, status=404)
+        # Один запрос по двум уникальным индексам (phone и phone_normalized)
+        d = Driver.objects.select_related("car").filter(_phone_q(phone)).first()
+        if d is None:
+            return Response({"detail": "not found"}, status=404)
+        return Response(DriverDetailSerializer(d).data)
 
 
 # CRUD над слотами
@@ -53,6 +73,10 @@ class SlotViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
         if want_date:
             qs = qs.filter(date=want_date)
         qs = qs.order_by("date", "time")
+        page = self.paginate_queryset(qs)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         return Response(self.get_serializer(qs, many=True).data)
 
     @action(detail=False, methods=["get"])
@@ -70,7 +94,7 @@ class SlotViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
             .distinct()
             .order_by("date")
         )
-        return Response([str(d) for d in qs])
+        return Response(list(qs))
 
 
 # CRUD над записями
@@ -83,6 +107,21 @@ class AppointmentViewSet(
     queryset = Appointment.objects.select_related("slot", "driver", "car")
     serializer_class = AppointmentSerializer
 
+    def get_serializer_class(self):
+
+        # Для чтения - сериализатор без валидаторов записи
+        if self.action in ("retrieve", "cancel_user"):
+            return AppointmentReadSerializer
+        return super().get_serializer_class()
+
+    def perform_create(self, serializer):
+
+        # Ошибки модели (например, слот уже занят) отдаем как 400, а не 500
+        try:
+            serializer.save()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
     @action(detail=False, methods=["get"])
     def active_by_phone(self, request):
 
@@ -90,25 +129,28 @@ class AppointmentViewSet(
         phone = request.query_params.get("phone")
         if not phone:
             return Response({"detail": "phone required"}, status=400)
-        try:
-            d = Driver.objects.get(phone=phone)
-        except Driver.DoesNotExist:
+        driver_id = (
+            Driver.objects.filter(_phone_q(phone)).values_list("id", flat=True).first()
+        )
+        if driver_id is None:
             return Response({"detail": "driver not found"}, status=404)
+
+        # Берем только нужные колонки одной выборкой, без создания моделей
         qs = (
             self.get_queryset()
-            .filter(driver=d, status=AppointmentStatus.ACTIVE)
+            .filter(driver_id=driver_id, status=AppointmentStatus.ACTIVE)
             .order_by("slot__date", "slot__time")
+            .values("id", "slot__date", "slot__time", "car__plate_number")
         )
-        data = []
-        for ap in qs:
-            data.append(
-                {
-                    "id": ap.id,
-                    "date": str(ap.slot.date),
-                    "time": ap.slot.time.strftime("%H:%M"),
-                    "car_plate": ap.car.plate_number,
-                }
-            )
+        data = [
+            {
+                "id": r["id"],
+                "date": str(r["slot__date"]),
+                "time": f'{r["slot__time"].hour:02d}:{r["slot__time"].minute:02d}',
+                "car_plate": r["car__plate_number"],
+            }
+            for r in qs
+        ]
         return Response(data)
 
     @action(detail=True, methods=["post"])
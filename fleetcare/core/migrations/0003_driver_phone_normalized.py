@@ -0,0 +1,59 @@
+# Generated by Django 4.2.23 on 2026-10-14 10:00
+
+import re
+
+from django.db import migrations, models
+
+
+def fill_phone_normalized(apps, schema_editor):
+
+    # Заполняем нормализованный телефон у существующих водителей
+    Driver = apps.get_model("core", "Driver")
+    non_digit = re.compile(r"\D+")
+    by_norm = {}
+    for pk, phone in Driver.objects.values_list("id", "phone"):
+        by_norm.setdefault(non_digit.sub("", phone or ""), []).append((pk, phone))
+
+    # Один номер в разных форматах нарушит уникальность - останавливаемся до записи
+    duplicates = [rows for rows in by_norm.values() if len(rows) > 1]
+    if duplicates:
+        details = "; ".join(
+            ", ".join(f"id={pk} {phone!r}" for pk, phone in rows) for rows in duplicates
+        )
+        raise RuntimeError(
+            "Несколько водителей с одним номером телефона в разных форматах, "
+            f"исправьте телефоны перед миграцией: {details}"
+        )
+    for norm, rows in by_norm.items():
+        Driver.objects.filter(pk=rows[0][0]).update(phone_normalized=norm)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0002_driver_chat_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="driver",
+            name="phone_normalized",
+            field=models.CharField(
+                default="",
+                editable=False,
+                max_length=32,
+                verbose_name="Телефон (только цифры)",
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_phone_normalized, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="driver",
+            name="phone_normalized",
+            field=models.CharField(
+                editable=False,
+                max_length=32,
+                unique=True,
+                verbose_name="Телефон (только цифры)",
+            ),
+        ),
+    ]
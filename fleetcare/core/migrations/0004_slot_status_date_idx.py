@@ -0,0 +1,18 @@
+# Generated by Django 4.2.23 on 2026-10-14 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0003_driver_phone_normalized"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="slot",
+            index=models.Index(
+                fields=["status", "date"], name="slot_status_date_idx"
+            ),
+        ),
+    ]
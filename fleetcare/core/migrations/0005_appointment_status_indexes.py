@@ -0,0 +1,22 @@
+# Generated by Django 4.2.23 on 2026-10-14 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0004_slot_status_date_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["driver", "status"], name="appt_driver_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(fields=["slot", "status"], name="appt_slot_status_idx"),
+        ),
+    ]
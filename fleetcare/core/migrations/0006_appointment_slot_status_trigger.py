@@ -0,0 +1,42 @@
+# Generated by Django 4.2.23 on 2026-10-14 11:30
+
+from django.db import migrations
+
+# Статус слота поддерживается в БД: активная запись занимает слот, отмена освобождает
+CREATE_TRIGGER = """
+CREATE OR REPLACE FUNCTION core_appointment_sync_slot() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND OLD.status IS NOT DISTINCT FROM NEW.status THEN
+        RETURN NULL;
+    END IF;
+    IF NEW.status = 'active' THEN
+        UPDATE core_slot SET status = 'busy'
+        WHERE id = NEW.slot_id AND status <> 'busy';
+    ELSIF TG_OP = 'UPDATE'
+        AND NEW.status IN ('cancelled_manager', 'cancelled_user') THEN
+        UPDATE core_slot SET status = 'free'
+        WHERE id = NEW.slot_id AND status <> 'free';
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_appointment_sync_slot
+AFTER INSERT OR UPDATE OF status ON core_appointment
+FOR EACH ROW EXECUTE FUNCTION core_appointment_sync_slot();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS core_appointment_sync_slot ON core_appointment;
+DROP FUNCTION IF EXISTS core_appointment_sync_slot();
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("core", "0005_appointment_status_indexes"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+    ]
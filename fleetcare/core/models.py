@@ -1,9 +1,19 @@
-from django.db import models
+from concurrent.futures import ThreadPoolExecutor
+from django.db import models, transaction, close_old_connections
 from django.core.validators import MinValueValidator
 from django.utils.translation import gettext_lazy as _
+import atexit
 import os
+import re
 import httpx
-from django.utils import timezone
+
+# Все нецифровые символы (для нормализации телефона)
+_NON_DIGIT_RE = re.compile(r"\D+")
+
+
+# Нормализация телефона: оставляем только цифры (единое правило для модели и API)
+def normalize_phone(phone: str) -> str:
+    return _NON_DIGIT_RE.sub("", phone or "")
 
 
 # Для слота
@@ -49,12 +59,56 @@ class Automobile(models.Model):
         # Пересчет следующего пробега
         self.next_service_mileage = self.last_service_mileage + self.service_interval_km
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+
+        # Запоминаем значения из БД, чтобы обновлять только измененные колонки
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = instance._tracked_values()
+        return instance
+
+    def _tracked_values(self):
+        return {
+            f.attname: self.__dict__.get(f.attname)
+            for f in self._meta.concrete_fields
+            if not f.primary_key
+        }
+
     def save(self, *args, **kwargs):
 
         # Гарантия перерасчета при каждом сохранении
         self.recalc_next_service()
+        always = {"next_service_mileage", "updated_at"}
+        loaded = getattr(self, "_loaded_values", None)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+
+            # Пробег следующего ТО зависит от этих полей
+            if {"last_service_mileage", "service_interval_km"} & set(update_fields):
+                kwargs["update_fields"] = {*update_fields, *always}
+        elif (
+            loaded is not None
+            and not args
+            and not self._state.adding
+            and not kwargs.get("force_insert")
+        ):
+
+            # Обновляем только колонки, изменившиеся с момента загрузки
+            current = self._tracked_values()
+            changed = {k for k, v in current.items() if loaded.get(k) != v}
+            kwargs["update_fields"] = changed | always
         super().save(*args, **kwargs)
 
+        # После частичного сохранения чистыми считаются только записанные поля
+        written = kwargs.get("update_fields")
+        if written is None:
+            self._loaded_values = self._tracked_values()
+        elif loaded is not None:
+            current = self._tracked_values()
+            for name in written:
+                attname = self._meta.get_field(name).attname
+                loaded[attname] = current[attname]
+
 
 # Водитель
 class Driver(models.Model):
@@ -63,6 +117,11 @@ class Driver(models.Model):
     first_name = models.CharField("Имя", max_length=64)
     last_name = models.CharField("Фамилия", max_length=64)
     phone = models.CharField("Телефон", max_length=32, unique=True)
+
+    # Только цифры телефона для быстрого поиска по индексу
+    phone_normalized = models.CharField(
+        "Телефон (только цифры)", max_length=32, unique=True, editable=False
+    )
     car = models.OneToOneField(
         Automobile,
         on_delete=models.PROTECT,
@@ -79,6 +138,32 @@ class Driver(models.Model):
     def __str__(self):
         return f"{self.last_name} {self.first_name}"
 
+    def validate_unique(self, exclude=None):
+
+        # Телефоны, различающиеся только форматированием, считаются одинаковыми
+        super().validate_unique(exclude=exclude)
+        if exclude and "phone" in exclude:
+            return
+        if (
+            Driver.objects.exclude(pk=self.pk)
+            .filter(phone_normalized=normalize_phone(self.phone))
+            .exists()
+        ):
+            from django.core.exceptions import ValidationError
+
+            raise ValidationError(
+                {"phone": "Водитель с таким номером телефона уже существует"}
+            )
+
+    def save(self, *args, **kwargs):
+
+        # Синхронизация нормализованного телефона при каждом сохранении
+        self.phone_normalized = normalize_phone(self.phone)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "phone" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "phone_normalized"}
+        super().save(*args, **kwargs)
+
 
 # Слот
 class Slot(models.Model):
@@ -94,6 +179,9 @@ class Slot(models.Model):
         unique_together = [("date", "time")]
         ordering = ["date", "time"]
 
+        # Поиск свободных дат: WHERE status = 'free' AND date BETWEEN ...
+        indexes = [models.Index(fields=["status", "date"], name="slot_status_date_idx")]
+
     def __str__(self):
         return f"{self.date} {self.time}"
 
@@ -121,6 +209,12 @@ class Appointment(models.Model):
         verbose_name_plural = "Записи"
         ordering = ["slot__date", "slot__time"]
 
+        # Активные записи водителя и записи по слоту с фильтром по статусу
+        indexes = [
+            models.Index(fields=["driver", "status"], name="appt_driver_status_idx"),
+            models.Index(fields=["slot", "status"], name="appt_slot_status_idx"),
+        ]
+
     def __str__(self):
         return f"{self.slot} — {self.driver} — {self.car}"
 
@@ -138,33 +232,78 @@ class Appointment(models.Model):
 
             raise ValidationError("Выбранный слот уже занят")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+
+        # Запоминаем статус из БД, чтобы не перечитывать запись при сохранении
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+    def _sync_cached_slot(self, new_status):
+
+        # Статус слота в БД меняет триггер (миграция 0006), здесь - только кэш
+        if Appointment.slot.is_cached(self):
+            self.slot.status = new_status
+
+    def _create_locking_slot(self, *args, **kwargs):
+
+        # Блокируем строку слота, чтобы параллельные записи не заняли его дважды
+        with transaction.atomic():
+            slot = Slot.objects.select_for_update().get(pk=self.slot_id)
+            if slot.status != SlotStatus.FREE:
+                from django.core.exceptions import ValidationError
+
+                raise ValidationError("Выбранный слот уже занят")
+            self.slot = slot
+            super().save(*args, **kwargs)
+
+            # Если новая активная запись то слот занят
+            if self.status == AppointmentStatus.ACTIVE:
+                self._sync_cached_slot(SlotStatus.BUSY)
+        self._loaded_status = self.status
+
     def save(self, *args, **kwargs):
 
         # Автоматическое управление статусом слота
         creating = self.id is None
-        prev = None
-        if not creating:
-            prev = Appointment.objects.get(pk=self.id)
+        if creating:
+            self._create_locking_slot(*args, **kwargs)
+            return
+        prev_status = getattr(self, "_loaded_status", None)
+        if prev_status is None:
+
+            # Объект не из БД (или статус отложен) - читаем только статус
+            prev_status = (
+                Appointment.objects.filter(pk=self.id)
+                .values_list("status", flat=True)
+                .first()
+            )
         super().save(*args, **kwargs)
 
-        # Если новая активная запись то занимаем слот
-        if creating and self.status == AppointmentStatus.ACTIVE:
-            if self.slot.status != SlotStatus.BUSY:
-                self.slot.status = SlotStatus.BUSY
-                self.slot.save(update_fields=["status"])
-
-        # Если статус изменен на отмену то освобождаем слот
-        if prev and prev.status != self.status:
-            if self.status in (
+        # Статус не записан (update_fields без "status") - в БД он прежний
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "status" not in update_fields:
+            return
+        self._loaded_status = self.status
+
+        # Если статус изменен: активная запись занимает слот, отмена освобождает
+        if prev_status and prev_status != self.status:
+            if self.status == AppointmentStatus.ACTIVE:
+                self._sync_cached_slot(SlotStatus.BUSY)
+            elif self.status in (
                 AppointmentStatus.CANCELLED_MANAGER,
                 AppointmentStatus.CANCELLED_USER,
             ):
-                if self.slot.status != SlotStatus.FREE:
-                    self.slot.status = SlotStatus.FREE
-                    self.slot.save(update_fields=["status"])
-                send_bot_notification(
-                    self.driver,
-                    f"Ваша запись на {self.slot.date} {self.slot.time} отменена",
+                self._sync_cached_slot(SlotStatus.FREE)
+
+                # Уведомление уходит в фоне после коммита, не задерживая запрос
+                driver_id = self.driver_id
+                text = f"Ваша запись на {self.slot.date} {self.slot.time} отменена"
+                transaction.on_commit(
+                    lambda: _notify_executor.submit(
+                        _send_bot_notification_bg, driver_id, text
+                    )
                 )
 
 
@@ -183,13 +322,40 @@ class Notification(models.Model):
         return f"{self.created_at} {self.driver} {self.text[:32]}"
 
 
-# Отправка уведомления водителю в Telegram и запись в журнал Notification
-def send_bot_notification(driver: "Driver", text: str):
+# Пул потоков для фоновой отправки уведомлений
+_notify_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="notify")
+
+
+# Общий клиент Telegram API: соединение (TCP/TLS) переиспользуется между вызовами
+_TG_CLIENT = httpx.Client(
+    http2=True, timeout=5.0, limits=httpx.Limits(max_connections=10)
+)
+atexit.register(_TG_CLIENT.close)
 
-    # 1. Сохраняем уведомление в БД (для менеджера в админке)
-    from .models import Notification
 
-    Notification.objects.create(driver=driver, text=text, created_at=timezone.now())
+# Фоновая обертка: ошибки не теряются, соединение с БД потока закрывается
+def _send_bot_notification_bg(driver_id: int, text: str):
+    try:
+        send_bot_notification(driver_id, text)
+    except Exception as e:
+        print(f"Ошибка при отправке уведомления: {e}")
+    finally:
+        close_old_connections()
+
+
+# Отправка уведомления водителю в Telegram и запись в журнал Notification
+def send_bot_notification(driver_id: int, text: str):
+    driver = (
+        Driver.objects.filter(pk=driver_id)
+        .only("id", "first_name", "last_name", "chat_id")
+        .first()
+    )
+    if driver is None:
+        print(f"Водитель {driver_id} не найден - уведомление не отправлено.")
+        return
+
+    # 1. Сохраняем уведомление в БД для менеджера (created_at - через auto_now_add)
+    Notification.objects.create(driver=driver, text=text)
 
     # 2. Пытаемся отправить сообщение через Telegram Bot API
     bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -201,14 +367,13 @@ def send_bot_notification(driver: "Driver", text: str):
         return
     message = f"{text}"
     try:
-        # Используем httpx с таймаутом и обработкой ошибок
+        # Используем общий httpx-клиент с таймаутом и обработкой ошибок
         api_url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
         payload = {"chat_id": driver.chat_id, "text": message}
-        with httpx.Client(timeout=5.0) as client:
-            resp = client.post(api_url, json=payload)
-            if resp.status_code != 200:
-                print(f"Ошибка Telegram API: {resp.status_code} -> {resp.text}")
-            else:
-                print(f"Уведомление отправлено водителю {driver} ({driver.chat_id})")
+        resp = _TG_CLIENT.post(api_url, json=payload)
+        if resp.status_code != 200:
+            print(f"Ошибка Telegram API: {resp.status_code} -> {resp.text}")
+        else:
+            print(f"Уведомление отправлено водителю {driver} ({driver.chat_id})")
     except Exception as e:
         print(f"Ошибка при отправке уведомления: {e}")
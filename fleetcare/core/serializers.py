@@ -1,9 +1,24 @@
+from copy import copy
 from rest_framework import serializers
-from .models import Automobile, Driver, Slot, Appointment
+from .models import Automobile, Driver, Slot, Appointment, normalize_phone
+
+
+# Кэш полей сериализатора на уровне класса (поля модели не меняются между запросами)
+class CachedFieldsMixin:
+    _fields_cache = {}
+
+    def get_fields(self):
+
+        # Интроспекция модели выполняется один раз, экземпляр получает копии полей
+        key = type(self)
+        cache = CachedFieldsMixin._fields_cache
+        if key not in cache:
+            cache[key] = super().get_fields()
+        return {name: copy(field) for name, field in cache[key].items()}
 
 
 # Авто
-class AutomobileSerializer(serializers.ModelSerializer):
+class AutomobileSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Automobile
         fields = [
@@ -15,27 +30,62 @@ class AutomobileSerializer(serializers.ModelSerializer):
             "service_interval_km",
             "next_service_mileage",
         ]
+        read_only_fields = fields
+
+
+# Авто внутри водителя (кратко: только госномер)
+class NestedAutomobileSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Automobile
+        fields = ["id", "plate_number"]
+        read_only_fields = fields
 
 
 # Водитель
-class DriverSerializer(serializers.ModelSerializer):
-    car = AutomobileSerializer(read_only=True)
+class DriverSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    car = NestedAutomobileSerializer(read_only=True)
     chat_id = serializers.IntegerField(required=False, allow_null=True)
 
     class Meta:
         model = Driver
         fields = ["id", "first_name", "last_name", "phone", "car", "chat_id"]
 
+    def validate_phone(self, value):
+
+        # Тот же номер в другом формате уже есть (уникальность по phone_normalized)
+        qs = Driver.objects.filter(phone_normalized=normalize_phone(value))
+        if self.instance is not None:
+            qs = qs.exclude(pk=self.instance.pk)
+        if qs.exists():
+            raise serializers.ValidationError(
+                "Водитель с таким номером телефона уже существует"
+            )
+        return value
+
+
+# Водитель (только чтение: list/retrieve)
+class DriverReadSerializer(DriverSerializer):
+    chat_id = serializers.IntegerField(read_only=True)
+
+    class Meta(DriverSerializer.Meta):
+        read_only_fields = DriverSerializer.Meta.fields
+
+
+# Водитель с полными данными авто (поиск по телефону: боту нужны марка и пробеги)
+class DriverDetailSerializer(DriverReadSerializer):
+    car = AutomobileSerializer(read_only=True)
+
 
 # Слот
-class SlotSerializer(serializers.ModelSerializer):
+class SlotSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Slot
         fields = ["id", "date", "time", "status"]
+        read_only_fields = fields
 
 
 # Запись
-class AppointmentSerializer(serializers.ModelSerializer):
+class AppointmentSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     slot = SlotSerializer(read_only=True)
     slot_id = serializers.PrimaryKeyRelatedField(
         source="slot", queryset=Slot.objects.all(), write_only=True, required=True
@@ -44,3 +94,13 @@ class AppointmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Appointment
         fields = ["id", "slot", "slot_id", "driver", "car", "status", "created_at"]
+
+
+# Запись (только чтение: retrieve и ответ на отмену)
+class AppointmentReadSerializer(AppointmentSerializer):
+    slot_id = None
+
+    class Meta(AppointmentSerializer.Meta):
+        fields = ["id", "slot", "driver", "car", "status", "created_at"]
+        read_only_fields = fields
+
@@ -1,3 +1,22 @@
 from django.test import TestCase
 
-# Create your tests here.
+from .models import Automobile
+
+
+# Авто: сохранение только измененных колонок
+class AutomobileSaveTests(TestCase):
+    def test_partial_save_keeps_other_changes_for_next_save(self):
+        Automobile.objects.create(
+            plate_number="А001АА", make="OLD", model="X", last_service_mileage=0
+        )
+        car = Automobile.objects.get(plate_number="А001АА")
+        car.make = "NEW"
+        car.model = "Y"
+
+        # Частичное сохранение пишет только model, make остается измененным
+        car.save(update_fields=["model"])
+        car.save()
+
+        car.refresh_from_db()
+        self.assertEqual(car.make, "NEW")
+        self.assertEqual(car.model, "Y")